@@ -1,10 +1,13 @@
+import os
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 from tkcalendar import DateEntry
 from datetime import datetime, date
 from task_manager import TaskManager
 from notification_manager import NotificationManager
 from automation_handler import AutomationHandler
+from task_sync import sync, parse_address, SocketTransport, SyncServer, DEFAULT_PORT
 
 class TaskAnythingApp:
     def __init__(self):
@@ -13,7 +16,10 @@ class TaskAnythingApp:
         self.task_manager = TaskManager()
         self.notification_manager = NotificationManager(self.task_manager)
         self.automation_handler = AutomationHandler()
+        self.sync_secret = os.getenv('TASK_SYNC_SECRET')
+        self.sync_server = None
         self.create_btn = None
+        self.sync_btn = None
         self.setup_gui()
     
     def setup_gui(self):
@@ -66,6 +72,10 @@ class TaskAnythingApp:
         new_btn = ttk.Button(button_frame, text="New Task", command=self.clear_form)
         new_btn.pack(side=tk.LEFT, padx=5)
         
+        # Sync button
+        self.sync_btn = ttk.Button(button_frame, text="Sync", command=self.sync_tasks)
+        self.sync_btn.pack(side=tk.LEFT, padx=5)
+        
         # Bind task type changes
         self.task_type.bind('<<ComboboxSelected>>', self.on_task_type_change)
     
@@ -137,7 +147,56 @@ class TaskAnythingApp:
         from task_view import TaskViewWindow
         TaskViewWindow(self.root, self.task_manager)
     
+    def start_sync_server(self):
+        """Serve this store to peers when a sync secret is configured"""
+        if not self.sync_secret:
+            return
+        host = os.getenv('TASK_SYNC_HOST', '127.0.0.1')
+        port = int(os.getenv('TASK_SYNC_PORT', DEFAULT_PORT))
+        try:
+            self.sync_server = SyncServer(self.task_manager, self.sync_secret, host, port)
+            self.sync_server.start()
+            print(f"Sync server listening on {host}:{port}")
+        except OSError as e:
+            print(f"Failed to start sync server: {e}")
+    
+    def sync_tasks(self):
+        """Exchange task changes with another workstation"""
+        if not self.sync_secret:
+            messagebox.showwarning("Sync", "Set TASK_SYNC_SECRET to sync with other machines")
+            return
+        peer = simpledialog.askstring("Sync Tasks", "Peer (host[:port]):", parent=self.root)
+        if not peer:
+            return
+        try:
+            host, port = parse_address(peer)
+        except ValueError as e:
+            messagebox.showerror("Sync Failed", str(e))
+            return
+        
+        # Network I/O runs off the Tk thread so an unreachable peer doesn't freeze the UI
+        self.sync_btn.configure(state='disabled')
+        def worker():
+            try:
+                result = sync(self.task_manager, SocketTransport(host, self.sync_secret, port))
+            except (OSError, ValueError, RuntimeError) as e:
+                error = str(e)
+                self.root.after(0, lambda: self.on_sync_done(error=error))
+            else:
+                self.root.after(0, lambda: self.on_sync_done(result=result))
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_sync_done(self, result=None, error=None):
+        """Report a finished sync on the Tk thread"""
+        self.sync_btn.configure(state='normal')
+        if error:
+            messagebox.showerror("Sync Failed", error)
+            return
+        self.update_task_counter()
+        messagebox.showinfo("Sync", f"Received {result['received']} and sent {result['sent']} tasks")
+    
     def run(self):
+        self.start_sync_server()
         self.notification_manager.start_reminder_thread()
         self.root.mainloop()
 
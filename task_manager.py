@@ -1,13 +1,68 @@
 import json
+import os
+import socket
+import threading
+import uuid
+from bisect import bisect_right
 from datetime import datetime
 import hashlib
+from task_query import QueryEngine
 
 __all__ = ['TaskManager']
 
+# Fields with value -> position indexes used by the query engine
+INDEXED_FIELDS = ('status', 'priority', 'type')
+
+# Fields a task received from a peer must carry before it is merged
+SYNCED_TASK_FIELDS = ('id', 'type', 'priority', 'due_date', 'description', 'status', 'created_at')
+
+# Initial clocks for tasks that predate sync. Every machine stamps a legacy
+# file the same way, and a completed copy outranks a pending one.
+LEGACY_PENDING_CLOCK = 1
+LEGACY_COMPLETED_CLOCK = 2
+
+def validate_synced_task(task):
+    """Raise ValueError if a task received from a peer is malformed"""
+    if not isinstance(task, dict):
+        raise ValueError("Synced task must be an object")
+    for field in SYNCED_TASK_FIELDS:
+        if not isinstance(task.get(field), str):
+            raise ValueError(f"Synced task is missing '{field}'")
+    rev = task.get('rev')
+    if (not isinstance(rev, list) or len(rev) != 2 or type(rev[0]) is not int
+            or rev[0] < 0 or not isinstance(rev[1], str)):
+        raise ValueError(f"Synced task {task['id']} has an invalid 'rev'")
+    if task['status'] not in ('pending', 'completed'):
+        raise ValueError(f"Synced task {task['id']} has an invalid status")
+    for field in ('created_at', 'completed_at'):
+        if field not in task:
+            continue
+        try:
+            datetime.fromisoformat(task[field])
+        except (TypeError, ValueError):
+            raise ValueError(f"Synced task {task['id']} has an invalid '{field}'")
+    try:
+        datetime.strptime(task['due_date'], '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"Synced task {task['id']} has an invalid 'due_date'")
+
+def validate_vector(vector):
+    if not isinstance(vector, dict) or not all(
+            isinstance(replica, str) and type(clock) is int for replica, clock in vector.items()):
+        raise ValueError("Invalid version vector")
+
+
 class TaskManager:
-    def __init__(self):
-        self.tasks_file = "tasks.json"
+    def __init__(self, tasks_file="tasks.json"):
+        self.tasks_file = tasks_file
+        # Guards the tasks against the sync server thread
+        self.lock = threading.RLock()
+        self.sync_file = os.path.splitext(tasks_file)[0] + "_sync.json"
         self.tasks = self.load_tasks()
+        self.revision = 0  # Bumped on every change so cached query results expire
+        self.build_indexes()
+        self.load_sync_state()
+        self.query_engine = QueryEngine(self)
     
     def load_tasks(self):
         try:
@@ -19,6 +74,155 @@ class TaskManager:
     def save_tasks(self):
         with open(self.tasks_file, 'w') as f:
             json.dump(self.tasks, f)
+        self.save_sync_state()
+    
+    def load_sync_state(self):
+        """Load this store's replica id, Lamport clock and version vector"""
+        # Where this store lives; a copied folder gets a replica id of its own
+        self.location = f"{socket.gethostname()}:{os.path.abspath(self.tasks_file)}"
+        try:
+            # Exclusive create so two managers opening a new store share one replica id
+            with open(self.sync_file, 'x') as f:
+                state = {'replica_id': uuid.uuid4().hex, 'location': self.location,
+                         'clock': 0, 'vector': {}}
+                json.dump(state, f)
+        except FileExistsError:
+            with open(self.sync_file, 'r') as f:
+                state = json.load(f)
+        self.replica_id = state['replica_id']
+        self.clock = state['clock']
+        self.vector = state['vector']  # replica id -> highest clock seen from it
+        if state.get('location') != self.location:
+            # The tasks and vector stay valid; only new edits need a fresh origin
+            self.replica_id = uuid.uuid4().hex
+            self.save_sync_state()
+        
+        # Tasks created before sync existed need a version to be shared
+        unversioned = [task for task in self.tasks if 'rev' not in task]
+        if unversioned and not self.vector:
+            for task in unversioned:
+                clock = LEGACY_COMPLETED_CLOCK if task.get('status') == 'completed' else LEGACY_PENDING_CLOCK
+                task['rev'] = [clock, self.replica_id]
+            self.clock = max(self.clock, LEGACY_COMPLETED_CLOCK)
+            self.vector[self.replica_id] = self.clock
+            self.build_change_log()
+        else:
+            self.build_change_log()
+            # Tasks added by hand to a store that already syncs get fresh versions
+            for task in unversioned:
+                self._stamp(task)
+        if unversioned:
+            self.save_tasks()
+    
+    def save_sync_state(self):
+        state = {'replica_id': self.replica_id, 'location': self.location,
+                 'clock': self.clock, 'vector': self.vector}
+        with open(self.sync_file, 'w') as f:
+            json.dump(state, f)
+    
+    def build_change_log(self):
+        """Index task versions per originating replica, ordered by clock"""
+        entries = {}
+        for task in self.tasks:
+            if 'rev' in task:
+                clock, replica = task['rev']
+                entries.setdefault(replica, []).append((clock, task['id']))
+                self.clock = max(self.clock, clock)
+    
+        self.change_log = {}  # replica id -> ([clocks], [task ids])
+        for replica, pairs in entries.items():
+            pairs.sort()
+            self.change_log[replica] = ([clock for clock, _ in pairs], [task_id for _, task_id in pairs])
+    
+    def _log_change(self, task):
+        clock, replica = task['rev']
+        clocks, ids = self.change_log.setdefault(replica, ([], []))
+        # Normally an append; insert keeps order if a version arrives out of sequence
+        i = bisect_right(clocks, clock)
+        clocks.insert(i, clock)
+        ids.insert(i, task['id'])
+    
+    def _stamp(self, task):
+        """Give a locally changed task a new version"""
+        self.clock += 1
+        task['rev'] = [self.clock, self.replica_id]
+        self.vector[self.replica_id] = self.clock
+        self._log_change(task)
+    
+    def changes_since(self, vector):
+        """Return the tasks whose current version is newer than the given version vector"""
+        validate_vector(vector)
+        changes = []
+        with self.lock:
+            for replica, (clocks, ids) in self.change_log.items():
+                start = bisect_right(clocks, vector.get(replica, 0))
+                for i in range(start, len(clocks)):
+                    task = self.tasks[self.positions[ids[i]]]
+                    # Skip log entries superseded by a later change to the same task
+                    if task['rev'] == [clocks[i], replica]:
+                        changes.append(task)
+        return changes
+    
+    def apply_changes(self, changes, vector):
+        """Merge tasks received from another store.
+    
+        Conflicts resolve deterministically: the higher [clock, replica id] version wins.
+        The whole batch is rejected with ValueError if any task is malformed.
+        """
+        if not isinstance(changes, list):
+            raise ValueError("Synced changes must be a list")
+        for task in changes:
+            validate_synced_task(task)
+        validate_vector(vector)
+    
+        with self.lock:
+            applied = 0
+            for task in sorted(changes, key=lambda t: t['rev']):
+                self.clock = max(self.clock, task['rev'][0])
+                pos = self.positions.get(task['id'])
+                if pos is None:
+                    self.tasks.append(task)
+                    pos = len(self.tasks) - 1
+                elif self.tasks[pos]['rev'] < task['rev']:
+                    self._unindex_task(pos, self.tasks[pos])
+                    self.tasks[pos] = task
+                else:
+                    continue
+                self._index_task(pos, task)
+                self._log_change(task)
+                applied += 1
+    
+            for replica, clock in vector.items():
+                if self.vector.get(replica, 0) < clock:
+                    self.vector[replica] = clock
+            if applied:
+                self.revision += 1
+                self.save_tasks()
+            else:
+                self.save_sync_state()
+            return applied
+    
+    def build_indexes(self):
+        """Build value -> task position indexes for the filterable fields"""
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        self.positions = {}  # task id -> position in self.tasks
+        for pos, task in enumerate(self.tasks):
+            self._index_task(pos, task)
+    
+    def _index_task(self, pos, task):
+        self.positions[task['id']] = pos
+        for field, index in self.indexes.items():
+            key = str(task.get(field, '')).strip().lower()
+            index.setdefault(key, set()).add(pos)
+    
+    def _unindex_task(self, pos, task):
+        for field, index in self.indexes.items():
+            key = str(task.get(field, '')).strip().lower()
+            positions = index.get(key)
+            if positions is not None:
+                positions.discard(pos)
+                if not positions:
+                    del index[key]
     
     def generate_task_id(self, task_data):
         # Create unique ID from timestamp and task data
@@ -52,30 +256,47 @@ class TaskManager:
         if not task_data.get('type') or not task_data.get('description'):
             raise ValueError("Task type and description are required")
             
-        if self.is_duplicate(task_data):
-            raise ValueError("Similar task was recently created. Please wait before creating again.")
-        
-        task_data['id'] = self.generate_task_id(task_data)
-        task_data['created_at'] = datetime.now().isoformat()
-        task_data['status'] = 'pending'
-        self.tasks.append(task_data)
-        self.save_tasks()
+        with self.lock:
+            if self.is_duplicate(task_data):
+                raise ValueError("Similar task was recently created. Please wait before creating again.")
+            
+            task_data['id'] = self.generate_task_id(task_data)
+            task_data['created_at'] = datetime.now().isoformat()
+            task_data['status'] = 'pending'
+            self._stamp(task_data)
+            self.tasks.append(task_data)
+            self._index_task(len(self.tasks) - 1, task_data)
+            self.revision += 1
+            self.save_tasks()
     
     def get_pending_tasks(self):
-        return [task for task in self.tasks if task['status'] == 'pending']
+        return self.find_tasks('status:pending')
+    
+    def find_tasks(self, query):
+        """Return tasks matching a filter query, e.g. 'status:pending priority:H'"""
+        with self.lock:
+            return self.query_engine.run(query)
     
     def complete_task(self, task_id):
         """Mark a task as completed"""
-        for task in self.tasks:
-            if task['id'] == task_id and task['status'] == 'pending':
-                task['status'] = 'completed'
-                task['completed_at'] = datetime.now().isoformat()
-                self.save_tasks()
-                return True
-        return False
+        with self.lock:
+            pos = self.positions.get(task_id)
+            if pos is None or self.tasks[pos]['status'] != 'pending':
+                return False
+            
+            task = self.tasks[pos]
+            self._unindex_task(pos, task)
+            task['status'] = 'completed'
+            task['completed_at'] = datetime.now().isoformat()
+            self._stamp(task)
+            self._index_task(pos, task)
+            self.revision += 1
+            self.save_tasks()
+            return True
     
     def get_task_counts(self):
         """Get counts of pending and completed tasks"""
-        pending = len([t for t in self.tasks if t['status'] == 'pending'])
-        completed = len([t for t in self.tasks if t['status'] == 'completed'])
+        status_index = self.indexes['status']
+        pending = len(status_index.get('pending', ()))
+        completed = len(status_index.get('completed', ()))
         return {'pending': pending, 'completed': completed}
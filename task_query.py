@@ -0,0 +1,262 @@
+import json
+import os
+import re
+from datetime import datetime
+
+__all__ = ['QueryEngine']
+
+# Query field names (and aliases) mapped to task keys
+FIELDS = {
+    'status': 'status',
+    'priority': 'priority',
+    'pri': 'priority',
+    'type': 'type',
+    'id': 'id',
+    'due': 'due_date',
+    'due_date': 'due_date',
+    'created': 'created_at',
+    'completed': 'completed_at',
+    'description': 'description',
+    'desc': 'description',
+}
+KEYWORD_FIELDS = {'status', 'priority', 'type', 'id'}
+DATE_FIELDS = {'due_date', 'created_at', 'completed_at'}
+
+DATE_OPERATORS = {
+    ':': lambda a, b: a == b,
+    '=': lambda a, b: a == b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+TOKEN_RE = re.compile(r'''
+    (?P<neg>-)?
+    (?:(?P<field>[A-Za-z_]+)(?P<op><=|>=|<|>|:|=))?
+    (?:"(?P<quoted>[^"]*)"|(?P<bare>[^\s"]*))
+''', re.VERBOSE)
+
+DEFAULT_QUERIES = {
+    'All': '',
+    'Pending': 'status:pending',
+    'Completed': 'status:completed',
+}
+
+MAX_CACHED_PLANS = 128
+MAX_CACHED_RESULTS = 64
+
+
+def tokenize(text):
+    """Split a query into (negated, field, op, value, quoted) terms"""
+    terms = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        if text[pos].isspace():
+            pos += 1
+            continue
+        match = TOKEN_RE.match(text, pos)
+        quoted = match.group('quoted')
+        value = quoted if quoted is not None else match.group('bare')
+        field = match.group('field')
+        if match.end() == pos or (match.end() < len(text) and not text[match.end()].isspace()):
+            raise ValueError(f"Unterminated quote or stray character near: {text[pos:]}")
+        if not value and quoted is None:
+            if field:
+                raise ValueError(f"Missing value for '{field}'")
+            raise ValueError(f"Unexpected '{match.group(0)}' in filter")
+        terms.append((bool(match.group('neg')), field, match.group('op'), value, quoted is not None))
+        pos = match.end()
+    return terms
+
+
+class QueryPlan:
+    """Parsed query: index lookups to narrow candidates plus a compiled row predicate"""
+    def __init__(self, index_terms, predicate):
+        self.index_terms = index_terms  # [(field, [values])]
+        self.predicate = predicate      # callable(task) -> bool, or None
+
+    def execute(self, task_manager):
+        """Return matching task positions in file order"""
+        candidates = None
+        # Intersect from the most selective index term down
+        lookups = []
+        for field, values in self.index_terms:
+            if field == 'id':
+                # Task ids resolve straight through TaskManager's id -> position map
+                positions = {task_manager.positions[v] for v in values if v in task_manager.positions}
+            else:
+                index = task_manager.indexes[field]
+                positions = set()
+                for value in values:
+                    positions |= index.get(value.lower(), set())
+            lookups.append(positions)
+        for positions in sorted(lookups, key=len):
+            candidates = positions if candidates is None else candidates & positions
+            if not candidates:
+                return []
+
+        tasks = task_manager.tasks
+        if candidates is None:
+            candidates = range(len(tasks))
+        else:
+            candidates = sorted(candidates)
+
+        predicate = self.predicate
+        if predicate is None:
+            return list(candidates)
+        return [pos for pos in candidates if predicate(tasks[pos])]
+
+
+def _keyword_predicate(key, values, negated):
+    values = frozenset(values)
+    def predicate(task):
+        return (str(task.get(key, '')).strip().lower() in values) != negated
+    return predicate
+
+
+def _date_predicate(key, op, value, negated):
+    compare = DATE_OPERATORS[op]
+    def predicate(task):
+        stamp = task.get(key)
+        return bool(stamp and compare(stamp[:10], value)) != negated
+    return predicate
+
+
+def _text_predicate(key, value, negated):
+    value = value.lower()
+    def predicate(task):
+        return (value in str(task.get(key, '')).lower()) != negated
+    return predicate
+
+
+def _compile(predicates):
+    """Fold term predicates into a single callable"""
+    if not predicates:
+        return None
+    if len(predicates) == 1:
+        return predicates[0]
+    predicates = tuple(predicates)
+    def predicate(task):
+        for term in predicates:
+            if not term(task):
+                return False
+        return True
+    return predicate
+
+
+def parse_query(text, indexed_fields=()):
+    """Parse query text into a QueryPlan.
+
+    Terms are ANDed together. Supported forms:
+      status:pending  priority:H,M  type:"PR Review"  -status:completed  id:<task id>
+      due<2026-11-01  created>=2026-10-01  completed:2026-10-18
+      desc:report  or a bare word to search the description
+    """
+    index_terms = []
+    keyword_terms = []
+    date_terms = []
+    text_terms = []
+
+    for negated, field, op, value, quoted in tokenize(text):
+        if field is None:
+            text_terms.append(_text_predicate('description', value, negated))
+            continue
+
+        key = FIELDS.get(field.lower())
+        if key is None:
+            raise ValueError(f"Unknown filter field '{field}'")
+
+        if key in KEYWORD_FIELDS:
+            if op not in (':', '='):
+                raise ValueError(f"Operator '{op}' is not supported for '{field}'")
+            # Commas separate alternatives only outside quotes
+            values = [value.strip()] if quoted else [v.strip() for v in value.split(',') if v.strip()]
+            if key in indexed_fields and not negated:
+                index_terms.append((key, values))
+            else:
+                keyword_terms.append(_keyword_predicate(key, [v.lower() for v in values], negated))
+        elif key in DATE_FIELDS:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f"Invalid date '{value}' for '{field}', expected YYYY-MM-DD")
+            date_terms.append(_date_predicate(key, op, value, negated))
+        else:
+            if op not in (':', '='):
+                raise ValueError(f"Operator '{op}' is not supported for '{field}'")
+            text_terms.append(_text_predicate(key, value, negated))
+
+    # Cheapest checks first so substring scans run on fewer rows
+    return QueryPlan(index_terms, _compile(keyword_terms + date_terms + text_terms))
+
+
+class QueryEngine:
+    """Runs filter queries against a TaskManager with plan and result caching"""
+    def __init__(self, task_manager):
+        self.task_manager = task_manager
+        self.queries_file = os.path.splitext(task_manager.tasks_file)[0] + "_queries.json"
+        self.saved_queries = self.load_queries()
+        self._plans = {}
+        self._results = {}
+        self._results_revision = None
+
+    def load_queries(self):
+        try:
+            with open(self.queries_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return dict(DEFAULT_QUERIES)
+
+    def save_queries(self):
+        with open(self.queries_file, 'w') as f:
+            json.dump(self.saved_queries, f)
+
+    def save_query(self, name, text):
+        """Store a named query after checking that it parses"""
+        name = name.strip()
+        if not name:
+            raise ValueError("Query name is required")
+        self.parse(text)
+        self.saved_queries[name] = text.strip()
+        self.save_queries()
+
+    def delete_query(self, name):
+        """Remove a named query; returns False if it did not exist"""
+        if self.saved_queries.pop(name, None) is not None:
+            self.save_queries()
+            return True
+        return False
+
+    def parse(self, text):
+        # Only trim the ends; inner whitespace can be part of a quoted value
+        text = text.strip()
+        plan = self._plans.get(text)
+        if plan is None:
+            indexed_fields = set(self.task_manager.indexes) | {'id'}
+            plan = parse_query(text, indexed_fields)
+            if len(self._plans) >= MAX_CACHED_PLANS:
+                self._plans.pop(next(iter(self._plans)))
+            self._plans[text] = plan
+        return plan
+
+    def run(self, text):
+        """Return the tasks matching the query text"""
+        plan = self.parse(text)
+        task_manager = self.task_manager
+
+        # Any change to the tasks invalidates every cached result
+        if self._results_revision != task_manager.revision:
+            self._results.clear()
+            self._results_revision = task_manager.revision
+
+        positions = self._results.get(plan)
+        if positions is None:
+            positions = plan.execute(task_manager)
+            if len(self._results) >= MAX_CACHED_RESULTS:
+                self._results.pop(next(iter(self._results)))
+            self._results[plan] = positions
+
+        tasks = task_manager.tasks
+        return [tasks[pos] for pos in positions]
@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import zlib
+
+__all__ = ['sync', 'SyncTransport', 'LocalTransport', 'FileTransport',
+           'SocketTransport', 'SyncServer']
+
+DEFAULT_PORT = 5055
+HEADER = struct.Struct('!I')  # Length prefix for socket frames
+DIGEST_SIZE = hashlib.sha256().digest_size
+MAX_FRAME_SIZE = 64 * 1024 * 1024       # Compressed bytes accepted from a peer
+MAX_MESSAGE_SIZE = 512 * 1024 * 1024    # Decompressed bytes accepted from a peer
+REQUEST_TIMEOUT = 30                    # Seconds the server waits on a peer's socket
+
+
+def encode_message(message):
+    return zlib.compress(json.dumps(message, separators=(',', ':')).encode())
+
+
+def decode_message(data):
+    """Decode a sync message, raising ValueError if it is corrupt or too large"""
+    decompressor = zlib.decompressobj()
+    try:
+        raw = decompressor.decompress(data, MAX_MESSAGE_SIZE)
+    except zlib.error as e:
+        raise ValueError(f"Corrupt sync message: {e}")
+    if decompressor.unconsumed_tail:
+        raise ValueError("Sync message is too large")
+    # json.JSONDecodeError and UnicodeDecodeError are both ValueErrors
+    message = json.loads(raw.decode())
+    if not isinstance(message, dict):
+        raise ValueError("Sync message must be an object")
+    return message
+
+
+def parse_address(text):
+    """Split 'host[:port]' into (host, port)"""
+    host, _, port = text.strip().partition(':')
+    if not host:
+        raise ValueError("Sync peer host is required")
+    return host, int(port) if port else DEFAULT_PORT
+
+
+def handle_message(task_manager, message):
+    """Answer a sync request from a peer against the local store"""
+    op = message.get('op')
+    if op == 'pull':
+        return {
+            'replica': task_manager.replica_id,
+            'vector': dict(task_manager.vector),
+            'changes': task_manager.changes_since(message['vector']),
+        }
+    if op == 'push':
+        applied = task_manager.apply_changes(message['changes'], message['vector'])
+        return {'applied': applied, 'vector': task_manager.vector}
+    raise ValueError(f"Unknown sync operation: {op}")
+
+
+def sync(task_manager, transport):
+    """Exchange changes with a peer store in both directions.
+
+    Each side only sends tasks the other's version vector has not seen, so a
+    sync after a few edits carries just those tasks.
+    """
+    with task_manager.lock:
+        vector = dict(task_manager.vector)
+    response = transport.request({'op': 'pull', 'vector': vector})
+    if not all(key in response for key in ('replica', 'vector', 'changes')):
+        raise ValueError("Incomplete sync response from peer")
+    if response['replica'] == task_manager.replica_id:
+        raise ValueError("Peer store has the same replica id as this one; "
+                         "sync needs two independent stores")
+
+    with task_manager.lock:
+        # Snapshot the vector with the outgoing tasks; a task added after this
+        # point must not be claimed as seen by the peer
+        outgoing = task_manager.changes_since(response['vector'])
+        vector = dict(task_manager.vector)
+        received = task_manager.apply_changes(response['changes'], response['vector'])
+        for replica, clock in response['vector'].items():
+            vector[replica] = max(vector.get(replica, 0), clock)
+        request = encode_message({'op': 'push', 'vector': vector, 'changes': outgoing})
+
+    transport.request_encoded(request)
+    return {'peer': response['replica'], 'received': received, 'sent': len(outgoing)}
+
+
+class SyncTransport:
+    """Carries sync messages to a peer store. Subclasses implement send()"""
+    def __init__(self):
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def request(self, message):
+        return self.request_encoded(encode_message(message))
+
+    def request_encoded(self, data):
+        self.bytes_sent += len(data)
+        reply = self.send(data)
+        self.bytes_received += len(reply)
+        response = decode_message(reply)
+        if 'error' in response:
+            raise RuntimeError(f"Sync peer error: {response['error']}")
+        return response
+
+    def send(self, data):
+        """Deliver an encoded request and return the encoded response"""
+        raise NotImplementedError
+
+
+def respond(task_manager, data):
+    """Decode a request, handle it and encode the response"""
+    try:
+        message = decode_message(data)
+        with task_manager.lock:
+            return encode_message(handle_message(task_manager, message))
+    except Exception as e:
+        return encode_message({'error': str(e)})
+
+
+class LocalTransport(SyncTransport):
+    """Syncs with a TaskManager in the same process"""
+    def __init__(self, peer):
+        super().__init__()
+        self.peer = peer
+
+    def send(self, data):
+        return respond(self.peer, data)
+
+
+class FileTransport(LocalTransport):
+    """Syncs with a tasks file on a local or shared drive"""
+    def __init__(self, tasks_file):
+        from task_manager import TaskManager
+        super().__init__(TaskManager(tasks_file))
+
+
+def check_secret(secret):
+    if not secret:
+        raise ValueError("A shared sync secret is required (set TASK_SYNC_SECRET)")
+    return secret.encode() if isinstance(secret, str) else secret
+
+
+class SocketTransport(SyncTransport):
+    """Syncs with a SyncServer over TCP, signing frames with a shared secret"""
+    def __init__(self, host, secret, port=DEFAULT_PORT, timeout=30):
+        super().__init__()
+        self.address = (host, port)
+        self.secret = check_secret(secret)
+        self.timeout = timeout
+
+    def send(self, data):
+        with socket.create_connection(self.address, timeout=self.timeout) as sock:
+            write_frame(sock, data, self.secret)
+            return read_frame(sock, self.secret)
+
+
+def sign(secret, data):
+    return hmac.new(secret, data, hashlib.sha256).digest()
+
+
+def write_frame(sock, data, secret):
+    sock.sendall(HEADER.pack(len(data)) + sign(secret, data) + data)
+
+
+def read_frame(sock, secret):
+    size, = HEADER.unpack(read_exact(sock, HEADER.size))
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"Sync frame of {size} bytes exceeds the limit")
+    digest = read_exact(sock, DIGEST_SIZE)
+    data = read_exact(sock, size)
+    if not hmac.compare_digest(digest, sign(secret, data)):
+        raise PermissionError("Sync frame failed authentication, check the shared secret")
+    return data
+
+
+def read_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            raise ConnectionError("Sync connection closed early, check the shared secret")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class SyncServer:
+    """Serves a TaskManager to SocketTransport peers holding the same secret.
+
+    Run it inside the process that owns the TaskManager so edits and incoming
+    changes share its lock; a second TaskManager on the same file would
+    overwrite them.
+    """
+    def __init__(self, task_manager, secret, host='127.0.0.1', port=DEFAULT_PORT):
+        self.task_manager = task_manager
+        self.secret = check_secret(secret)
+        self.server_thread = None
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                self.request.settimeout(REQUEST_TIMEOUT)
+                try:
+                    data = read_frame(self.request, server.secret)
+                except (ValueError, PermissionError, ConnectionError, socket.timeout) as e:
+                    print(f"Rejected sync request from {self.client_address[0]}: {e or 'timed out'}")
+                    return
+                try:
+                    write_frame(self.request, respond(server.task_manager, data), server.secret)
+                except OSError as e:
+                    print(f"Failed to answer sync request from {self.client_address[0]}: {e}")
+
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    from task_manager import TaskManager
+
+    parser = argparse.ArgumentParser(
+        description="Sync tasks between Task Anything stores. Only use this on a "
+                    "tasks file the app is not running on; the app serves and syncs itself.")
+    parser.add_argument('--tasks-file', default='tasks.json')
+    parser.add_argument('--secret', default=os.getenv('TASK_SYNC_SECRET'),
+                        help="shared secret (default: $TASK_SYNC_SECRET)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_cmd = commands.add_parser('serve', help="accept sync requests from peers")
+    serve_cmd.add_argument('--host', default='127.0.0.1',
+                           help="interface to listen on (default: 127.0.0.1)")
+    serve_cmd.add_argument('--port', type=int, default=DEFAULT_PORT)
+    sync_cmd = commands.add_parser('sync', help="sync with a peer (host[:port] or tasks file path)")
+    sync_cmd.add_argument('peer')
+    args = parser.parse_args()
+
+    task_manager = TaskManager(args.tasks_file)
+    if args.command == 'serve':
+        server = SyncServer(task_manager, args.secret, args.host, args.port)
+        print(f"Serving {args.tasks_file} on {args.host}:{args.port}")
+        server.serve_forever()
+        return
+
+    if args.peer.endswith('.json'):
+        transport = FileTransport(args.peer)
+    else:
+        host, port = parse_address(args.peer)
+        transport = SocketTransport(host, args.secret, port)
+    result = sync(task_manager, transport)
+    print(f"Synced with {result['peer']}: received {result['received']}, sent {result['sent']} "
+          f"({transport.bytes_sent + transport.bytes_received} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
 
 # Export TaskViewWindow class explicitly
@@ -19,10 +19,24 @@ class TaskViewWindow:
         filter_frame.grid(row=0, column=0, columnspan=2, sticky='ew', padx=5, pady=5)
         
         ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
-        self.status_filter = ttk.Combobox(filter_frame, values=['All', 'Pending', 'Completed'])
-        self.status_filter.set('All')
-        self.status_filter.pack(side=tk.LEFT, padx=5)
-        self.status_filter.bind('<<ComboboxSelected>>', lambda e: self.load_tasks())
+        self.saved_filter = ttk.Combobox(filter_frame, state='readonly', width=15)
+        self.saved_filter.pack(side=tk.LEFT, padx=5)
+        self.saved_filter.bind('<<ComboboxSelected>>', self.apply_saved_query)
+        
+        # Free-form query, e.g. status:pending priority:H due<2026-11-01 type:"PR Review"
+        self.query = ttk.Entry(filter_frame, width=50)
+        self.query.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.query.bind('<Return>', lambda e: self.load_tasks())
+        
+        save_btn = ttk.Button(filter_frame, text="Save", command=self.save_query)
+        save_btn.pack(side=tk.LEFT, padx=5)
+        
+        delete_btn = ttk.Button(filter_frame, text="Delete", command=self.delete_query)
+        delete_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.result_count = ttk.Label(filter_frame, text="")
+        self.result_count.pack(side=tk.RIGHT, padx=5)
+        self.refresh_saved_queries()
         
         # Create treeview
         columns = ('Type', 'Priority', 'Due Date', 'Description', 'Status', 'Created')
@@ -69,15 +83,58 @@ class TaskViewWindow:
         # Load tasks
         self.load_tasks()
         
+    def refresh_saved_queries(self):
+        names = list(self.task_manager.query_engine.saved_queries)
+        self.saved_filter.configure(values=names)
+        if names and not self.saved_filter.get():
+            self.saved_filter.set(names[0])
+            self.query.insert(0, self.task_manager.query_engine.saved_queries[names[0]])
+    
+    def apply_saved_query(self, event=None):
+        name = self.saved_filter.get()
+        text = self.task_manager.query_engine.saved_queries.get(name, '')
+        self.query.delete(0, tk.END)
+        self.query.insert(0, text)
+        self.load_tasks()
+    
+    def save_query(self):
+        """Save the current filter under a name for reuse"""
+        name = simpledialog.askstring("Save Filter", "Filter name:", parent=self.window)
+        if not name:
+            return
+        try:
+            self.task_manager.query_engine.save_query(name, self.query.get())
+        except ValueError as e:
+            messagebox.showwarning("Invalid Filter", str(e))
+            return
+        self.refresh_saved_queries()
+        self.saved_filter.set(name.strip())
+    
+    def delete_query(self):
+        """Remove the selected saved filter"""
+        name = self.saved_filter.get()
+        if not name:
+            return
+        if not messagebox.askyesno("Delete Filter", f"Delete saved filter '{name}'?", parent=self.window):
+            return
+        self.task_manager.query_engine.delete_query(name)
+        self.saved_filter.set('')
+        self.query.delete(0, tk.END)
+        self.refresh_saved_queries()
+        self.load_tasks()
+    
     def load_tasks(self):
+        try:
+            tasks = self.task_manager.find_tasks(self.query.get())
+        except ValueError as e:
+            messagebox.showwarning("Invalid Filter", str(e))
+            return
+        
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        status_filter = self.status_filter.get()
-        for task in self.task_manager.tasks:
-            if status_filter != 'All' and task['status'].capitalize() != status_filter:
-                continue
-                
+        self.result_count.config(text=f"{len(tasks)} of {len(self.task_manager.tasks)} tasks")
+        for task in tasks:
             created_at = datetime.fromisoformat(task['created_at']).strftime('%Y-%m-%d %H:%M')
             values = (
                 task['type'],
@@ -0,0 +1,96 @@
+import json
+import os
+import random
+
+import pytest
+
+from task_manager import TaskManager
+
+TYPES = ["Script Automation", "Email", "Meeting", "PR Review", "PR  Review", "Review, Urgent"]
+
+
+def make_tasks(count):
+    rng = random.Random(7)
+    return [{
+        'id': f'{i:032x}',
+        'type': rng.choice(TYPES),
+        'priority': rng.choice('HML'),
+        'due_date': f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+        'description': f'weekly report {i}' if i % 5 == 0 else f'task {i}',
+        'status': rng.choice(['pending', 'completed']),
+        'created_at': f'2026-10-{rng.randint(1, 28):02d}T09:00:00',
+    } for i in range(count)]
+
+
+@pytest.fixture
+def task_manager(tmp_path):
+    with open(tmp_path / 'tasks.json', 'w') as f:
+        json.dump(make_tasks(500), f)
+    return TaskManager(str(tmp_path / 'tasks.json'))
+
+
+def ids(tasks):
+    return [task['id'] for task in tasks]
+
+
+def test_mixed_query_matches_plain_filter(task_manager):
+    query = 'status:pending priority:H,M due<2026-07-01 -desc:report type:Email'
+    expected = [
+        task for task in task_manager.tasks
+        if task['status'] == 'pending' and task['priority'] in ('H', 'M')
+        and task['due_date'] < '2026-07-01' and 'report' not in task['description']
+        and task['type'] == 'Email'
+    ]
+
+    assert expected
+    assert ids(task_manager.find_tasks(query)) == ids(expected)
+
+
+@pytest.mark.parametrize('query', ['desc:"a b', '"', '-', 'status<pending', 'x:y', 'due<2026-13-01'])
+def test_invalid_queries_raise(task_manager, query):
+    with pytest.raises(ValueError):
+        task_manager.find_tasks(query)
+
+
+def test_quoted_values_keep_whitespace_and_commas(task_manager):
+    spaced = task_manager.find_tasks('type:"PR  Review"')
+    with_comma = task_manager.find_tasks('type:"Review, Urgent"')
+
+    assert spaced and all(task['type'] == 'PR  Review' for task in spaced)
+    assert with_comma and all(task['type'] == 'Review, Urgent' for task in with_comma)
+
+
+def test_id_lookup(task_manager):
+    task = task_manager.tasks[42]
+
+    assert task_manager.find_tasks(f'id:{task["id"]}') == [task]
+    assert len(task_manager.find_tasks(f'-id:{task["id"]}')) == len(task_manager.tasks) - 1
+
+
+def test_cached_results_expire_on_change(task_manager):
+    pending = len(task_manager.find_tasks('status:pending'))
+
+    task_manager.add_task({'type': 'Email', 'priority': 'H', 'due_date': '2026-11-01',
+                           'description': 'new'})
+    assert len(task_manager.find_tasks('status:pending')) == pending + 1
+
+    task_manager.complete_task(task_manager.tasks[-1]['id'])
+    assert len(task_manager.find_tasks('status:pending')) == pending
+
+    incoming = dict(task_manager.tasks[-1], id='f' * 32, status='pending',
+                    rev=[task_manager.clock + 1, 'peer'])
+    task_manager.apply_changes([incoming], {'peer': task_manager.clock + 1})
+    assert len(task_manager.find_tasks('status:pending')) == pending + 1
+
+
+def test_saved_queries_persist(task_manager, tmp_path):
+    engine = task_manager.query_engine
+    engine.save_query('Urgent', 'priority:H status:pending')
+
+    path = tmp_path / 'tasks_queries.json'
+    assert engine.queries_file == os.path.splitext(task_manager.tasks_file)[0] + '_queries.json'
+    with open(path) as f:
+        assert json.load(f)['Urgent'] == 'priority:H status:pending'
+
+    assert engine.delete_query('Urgent')
+    assert 'Urgent' not in TaskManager(task_manager.tasks_file).query_engine.saved_queries
@@ -0,0 +1,203 @@
+import json
+import shutil
+import socket
+import time
+
+import pytest
+
+import task_sync
+from task_manager import TaskManager
+from task_sync import sync, LocalTransport, SocketTransport, SyncServer
+
+SECRET = 'test-secret'
+
+
+def make_store(tmp_path, name):
+    directory = tmp_path / name
+    directory.mkdir(exist_ok=True)
+    return TaskManager(str(directory / 'tasks.json'))
+
+
+def add(task_manager, description):
+    task = {'type': 'Email', 'priority': 'H', 'due_date': '2026-11-01', 'description': description}
+    task_manager.add_task(task)
+    return task['id']
+
+
+def snapshot(task_manager):
+    return sorted(json.dumps(task, sort_keys=True) for task in task_manager.tasks)
+
+
+def legacy_tasks(count):
+    return [{
+        'id': f'{i:032x}',
+        'type': 'Meeting',
+        'priority': 'M',
+        'due_date': '2026-11-01',
+        'description': f'legacy task {i}',
+        'status': 'pending',
+        'created_at': '2026-10-01T10:00:00',
+    } for i in range(count)]
+
+
+def test_two_stores_converge(tmp_path):
+    a, b = make_store(tmp_path, 'a'), make_store(tmp_path, 'b')
+    add(a, 'from a')
+    add(b, 'from b')
+
+    result = sync(a, LocalTransport(b))
+
+    assert result == {'peer': b.replica_id, 'received': 1, 'sent': 1}
+    assert snapshot(a) == snapshot(b)
+    assert len(a.tasks) == 2
+
+
+def test_three_stores_converge(tmp_path):
+    a, b, c = (make_store(tmp_path, name) for name in 'abc')
+    add(a, 'from a')
+    add(c, 'from c')
+    sync(a, LocalTransport(b))
+    sync(c, LocalTransport(b))
+    b.complete_task(a.tasks[0]['id'])
+    sync(a, LocalTransport(b))
+    sync(c, LocalTransport(b))
+
+    assert snapshot(a) == snapshot(b) == snapshot(c)
+    assert a.get_task_counts() == {'pending': 1, 'completed': 1}
+
+
+def test_concurrent_completion_picks_same_winner(tmp_path):
+    a, b = make_store(tmp_path, 'a'), make_store(tmp_path, 'b')
+    task_id = add(a, 'shared')
+    sync(a, LocalTransport(b))
+    a.complete_task(task_id)
+    b.complete_task(task_id)
+
+    sync(a, LocalTransport(b))
+
+    winner = max(a.tasks[0]['rev'], b.tasks[0]['rev'])
+    assert a.tasks[0]['rev'] == b.tasks[0]['rev'] == winner
+    assert snapshot(a) == snapshot(b)
+
+
+def test_resync_sends_nothing(tmp_path):
+    a, b = make_store(tmp_path, 'a'), make_store(tmp_path, 'b')
+    add(a, 'one')
+    add(b, 'two')
+    sync(a, LocalTransport(b))
+
+    assert sync(a, LocalTransport(b)) == {'peer': b.replica_id, 'received': 0, 'sent': 0}
+    assert sync(b, LocalTransport(a)) == {'peer': a.replica_id, 'received': 0, 'sent': 0}
+
+
+def test_socket_round_trip(tmp_path):
+    a, b = make_store(tmp_path, 'a'), make_store(tmp_path, 'b')
+    add(a, 'from a')
+    add(b, 'from b')
+    server = SyncServer(b, SECRET, port=0)
+    server.start()
+    try:
+        with pytest.raises(ConnectionError):
+            sync(a, SocketTransport('127.0.0.1', 'wrong-secret', server.port))
+        result = sync(a, SocketTransport('127.0.0.1', SECRET, server.port))
+    finally:
+        server.stop()
+
+    assert result['received'] == 1 and result['sent'] == 1
+    assert snapshot(a) == snapshot(b)
+
+
+def test_server_drops_stalled_connections(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_sync, 'REQUEST_TIMEOUT', 0.2)
+    server = SyncServer(make_store(tmp_path, 'a'), SECRET, port=0)
+    server.start()
+    try:
+        with socket.create_connection(('127.0.0.1', server.port), timeout=5) as sock:
+            sock.sendall(b'\x00')  # Partial header, then nothing
+            started = time.monotonic()
+            assert sock.recv(1) == b''
+        assert time.monotonic() - started < 5
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize('field, value', [
+    ('created_at', None),
+    ('completed_at', 'yesterday'),
+    ('due_date', 'next week'),
+])
+def test_malformed_changes_are_rejected(tmp_path, field, value):
+    a = make_store(tmp_path, 'a')
+    task = legacy_tasks(1)[0]
+    task['rev'] = [5, 'peer']
+    if value is None:
+        del task[field]
+    else:
+        task[field] = value
+
+    with pytest.raises(ValueError):
+        a.apply_changes([task], {'peer': 5})
+    assert a.tasks == []
+
+
+def test_copied_store_gets_own_replica_id(tmp_path):
+    a = make_store(tmp_path, 'a')
+    add(a, 'before copy')
+    shutil.copytree(tmp_path / 'a', tmp_path / 'b')
+    b = make_store(tmp_path, 'b')
+    assert b.replica_id != a.replica_id
+
+    add(a, 'only on a')
+    add(b, 'only on b')
+    result = sync(a, LocalTransport(b))
+
+    assert result['received'] == 1 and result['sent'] == 1
+    assert snapshot(a) == snapshot(b)
+    assert len(a.tasks) == 3
+
+
+def test_sync_refuses_same_replica(tmp_path):
+    a, same = make_store(tmp_path, 'a'), make_store(tmp_path, 'a')
+
+    with pytest.raises(ValueError):
+        sync(a, LocalTransport(same))
+
+
+def test_new_store_keeps_one_replica_id(tmp_path):
+    first, second = make_store(tmp_path, 'a'), make_store(tmp_path, 'a')
+
+    assert first.replica_id == second.replica_id
+
+
+def test_legacy_completion_survives_first_sync(tmp_path):
+    # The same file copied to two machines, one of which completed a task before sync existed
+    completed = legacy_tasks(3)
+    completed[1].update(status='completed', completed_at='2026-10-02T10:00:00')
+    for name, tasks in (('a', completed), ('b', legacy_tasks(3))):
+        (tmp_path / name).mkdir()
+        with open(tmp_path / name / 'tasks.json', 'w') as f:
+            json.dump(tasks, f)
+    a, b = make_store(tmp_path, 'a'), make_store(tmp_path, 'b')
+
+    sync(b, LocalTransport(a))
+
+    assert snapshot(a) == snapshot(b)
+    assert b.tasks[1]['status'] == 'completed'
+
+
+def test_large_store_delta_is_small(tmp_path):
+    (tmp_path / 'a').mkdir()
+    with open(tmp_path / 'a' / 'tasks.json', 'w') as f:
+        json.dump(legacy_tasks(100000), f)
+    a, b = make_store(tmp_path, 'a'), make_store(tmp_path, 'b')
+    sync(a, LocalTransport(b))
+    add(a, 'new on a')
+    a.complete_task(a.tasks[10]['id'])
+    b.complete_task(b.tasks[20]['id'])
+
+    transport = LocalTransport(b)
+    result = sync(a, transport)
+
+    assert result['received'] == 1 and result['sent'] == 2
+    assert transport.bytes_sent + transport.bytes_received < 4096
+    assert a.get_task_counts() == b.get_task_counts() == {'pending': 99999, 'completed': 2}